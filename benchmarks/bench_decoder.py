@@ -0,0 +1,55 @@
+"""
+    Compares decoding a d.multicall2 get_torrents response with xmlrpc.client + parse_method_response
+    against XMLRPCDecoder.decode_multicall.
+        python -m benchmarks.bench_decoder [torrent_count]
+"""
+
+import sys
+import time
+import random
+import xmlrpc.client
+from pyruTorrent.pyruTorrent import RPCMethods, XMLRPCDecoder, KeyMaps
+
+
+def build_response(methods, count):
+    keys = methods[0]['keys']
+    rows = []
+    for i in range(count):
+        row = []
+        for key in keys:
+            if key == 'hash':
+                row.append(f'{i:040X}')
+            elif key in ('name', 'label', 'comment', 'base_path', 'base_parent_path', 'base_filename', 'loaded_file', 'priority_str', 'connection_current'):
+                row.append(f'{key}-{i}')
+            elif key == 'ratio_group':
+                row.append(['rat_1'])
+            else:
+                row.append(random.randint(0, 2 ** 31 - 1))
+        rows.append(row)
+    return xmlrpc.client.dumps(([[rows]],), methodresponse=True).encode()
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t_start
+        best = best is None and elapsed or min(best, elapsed)
+    return best, result
+
+
+if __name__ == '__main__':
+    count = len(sys.argv) > 1 and int(sys.argv[1]) or 60000
+    groups = [m['_meta_']['group_name'] for m in KeyMaps._map_array_]
+    methods = RPCMethods.get_all_torrents(view='default', exclude_keys=groups)
+    body = build_response(methods, count)
+    print(f'{count} torrents, {len(methods[0]["keys"])} keys, {len(body) / 2 ** 20:.1f} MB response')
+    stdlib_time, expected = timed(lambda: RPCMethods.parse_method_response(methods, xmlrpc.client.loads(body)[0][0]))
+    print(f'{"stdlib":<8} {stdlib_time:.3f}s')
+    for parser in ['auto', 'etree']:
+        decoder = XMLRPCDecoder(parser)
+        # seeding_time is relative to the current time, drop it before comparing
+        decoder_time, result = timed(lambda: decoder.decode_multicall(body, methods))
+        same = [{k: v for k, v in r.items() if k != 'seeding_time'} for r in result] == [{k: v for k, v in r.items() if k != 'seeding_time'} for r in expected]
+        print(f'{parser:<8} {decoder_time:.3f}s  {stdlib_time / decoder_time:.2f}x  identical={same}')
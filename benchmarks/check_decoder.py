@@ -0,0 +1,62 @@
+"""
+    Checks that XMLRPCDecoder.loads returns the same values as xmlrpc.client.loads,
+    exits with status 1 on any difference.
+        python -m benchmarks.check_decoder
+"""
+
+import sys
+import xmlrpc.client
+from pyruTorrent.pyruTorrent import XMLRPCDecoder
+
+
+STRINGS = [
+    '', ' ', 'plain', 'quote " and \' apostrophe', 'back\\slash \\n \\" \\u0041',
+    '<tag> & &amp; &lt;', 'tab\there', 'new\nline', 'ends with newline\n', '\nstarts with newline',
+    'cr\rlone', 'crlf\r\nline', 'cr at end\r', '\r\n', 'unicode é ✓ 日本', '  padded  ', '{"json": [1, 2]}',
+    '</string>', 'colon:comma,brace}bracket]',
+]
+
+VALUES = [
+    STRINGS,
+    [[s, len(s)] for s in STRINGS],
+    [{'name': s, 'n': i} for i, s in enumerate(STRINGS)],
+    {s or 'empty': s for s in STRINGS},
+    [0, -1, 2 ** 31 - 1, 1.5, -0.25, True, False, [], {}, [[]], [{}]],
+    [[['nested', ['deeper', [1, ['']]]]]],
+]
+
+RAW = [
+    # Formatting whitespace between tags, as some servers send it
+    b'<?xml version="1.0"?>\n<methodResponse>\n<params>\n<param>\n<value><array><data>\n<value><string>a</string></value>\n'
+    b'<value><i8>8</i8></value>\n<value>untyped</value>\n<value>untyped newline\n</value>\n<value><string>x\ny\n</string></value>\n</data></array></value>\n'
+    b'</param>\n</params>\n</methodResponse>\n',
+    b'<?xml version="1.0"?>\r\n<methodResponse><params><param><value><array><data>'
+    b'<value><string>lone\rcr</string></value><value><string>crlf\r\nend\r</string></value>'
+    b'<value><string>ref&#13;&#10;&#x9;&#233;</string></value><value><string>&quot;&apos;&gt;</string></value>'
+    b'</data></array></value></param></params></methodResponse>',
+    b'<?xml version="1.0"?><methodResponse><params><param><value><struct>'
+    b'<member><name>a&amp;b</name><value><string>v</string></value></member>'
+    b'<member><name>empty</name><value><string/></value></member>'
+    b'<member><name>nil</name><value><nil/></value></member>'
+    b'</struct></value></param></params></methodResponse>',
+]
+
+
+def bodies():
+    for value in VALUES:
+        yield xmlrpc.client.dumps((value,), methodresponse=True, allow_none=True).encode('utf-8')
+    yield from RAW
+
+
+if __name__ == '__main__':
+    failures = 0
+    for parser in ['auto', 'etree']:
+        decoder = XMLRPCDecoder(parser)
+        for body in bodies():
+            expected = xmlrpc.client.loads(body, use_builtin_types=False)[0]
+            result = decoder.loads(body)
+            if result != expected:
+                failures += 1
+                print(f'{parser}: mismatch\n  body:     {body[:200]!r}\n  expected: {expected!r}\n  result:   {result!r}')
+    print(failures and f'{failures} mismatches' or 'identical')
+    sys.exit(failures and 1 or 0)
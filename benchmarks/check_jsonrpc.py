@@ -0,0 +1,141 @@
+"""
+    Runs the same calls over XML-RPC and JSON-RPC against local stand-in servers
+    and checks protocol='auto' negotiation, exits with status 1 on any failure.
+        python -m benchmarks.check_jsonrpc
+"""
+
+import sys
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from xmlrpc.server import SimpleXMLRPCServer
+from pyruTorrent import rTorrent
+from pyruTorrent.pyruTorrent import KeyMaps
+
+
+HASHES = [f'{i:040X}' for i in range(25)]
+COLUMNS = {k[0]: len(v['_meta_']['keys']) for k, v in KeyMaps._maps_.items()}
+
+
+def value(_hash, name):
+    if _hash and _hash not in HASHES:
+        raise Exception('Could not find info-hash.')
+    if name == 'd.hash':
+        return _hash
+    if name == 'd.views':
+        return _hash.endswith('1') and ['rat_2'] or []
+    if name in ['d.name', 'd.custom1', 'd.custom2', 'd.base_path']:
+        return f'{name} "{_hash[-3:]}" \\ <&>\n'
+    if name in ['t.multicall', 'f.multicall', 'p.multicall']:
+        return [[f'{name}-{_hash[-3:]}'] + [1] * (COLUMNS[name[0]] - 1)]
+    if name == 'd.custom':
+        return '1000'
+    if name == 'system.client_version':
+        return '0.15.1'
+    return sum(map(ord, f'{_hash}{name}'))
+
+
+def call(name, params):
+    if name == 'd.multicall2':
+        return [[value(_hash, cmd.split('=')[0]) for cmd in params[2:]] for _hash in HASHES]
+    return value(params and params[0] or '', name)
+
+
+class XMLServer(SimpleXMLRPCServer):
+
+    def _dispatch(self, method, params):
+        if method == 'system.multicall':
+            output = []
+            for c in params[0]:
+                try:
+                    output.append([call(c['methodName'], c['params'])])
+                except Exception as e:
+                    output.append({'faultCode': 1, 'faultString': str(e)})
+            return output
+        return call(method, params)
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+
+    status = 200
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, request):
+        try:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'result': call(request['method'], request['params'])}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': 1, 'message': str(e)}}
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        # Batch responses may come back in any order
+        output = isinstance(payload, list) and [self.respond(r) for r in reversed(payload)] or self.respond(payload)
+        body = json.dumps(output).encode()
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnauthorizedHandler(JSONHandler):
+
+    status = 401
+
+
+class MethodNotFoundHandler(JSONHandler):
+
+    def respond(self, request):
+        return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': 'Method not found'}}
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/RPC2'
+
+
+def strip(result):
+    # seeding_time is relative to the current time
+    if isinstance(result, list):
+        return [strip(r) for r in result]
+    if isinstance(result, dict):
+        return {k: v for k, v in result.items() if k != 'seeding_time'}
+    return result
+
+
+def calls(rt):
+    return {
+        'get_hashes':       rt.get_hashes(),
+        'get_torrents':     rt.get_torrents(include_trackers=True, include_files=True),
+        'get_torrent':      rt.get_torrent(HASHES[1], include_trackers=True),
+        'strict=False':     rt.get_torrents(hashes=['F' * 40, HASHES[2]], only_keys=['hash', 'name'], strict=False),
+    }
+
+
+if __name__ == '__main__':
+    failures = []
+    xml_uri = serve(XMLServer(('127.0.0.1', 0), allow_none=True, logRequests=False))
+    json_uri = serve(HTTPServer(('127.0.0.1', 0), JSONHandler))
+    unauthorized_uri = serve(HTTPServer(('127.0.0.1', 0), UnauthorizedHandler))
+    not_found_uri = serve(HTTPServer(('127.0.0.1', 0), MethodNotFoundHandler))
+
+    for uri, expected in [(xml_uri, 'xmlrpc'), (json_uri, 'jsonrpc'), (not_found_uri, 'xmlrpc')]:
+        protocol = rTorrent(uri=uri, protocol='auto', timeout=5).protocol
+        if protocol != expected:
+            failures.append(f'protocol=auto on {expected} stand-in negotiated {protocol}')
+    try:
+        rTorrent(uri=unauthorized_uri, protocol='auto', timeout=5)
+        failures.append('protocol=auto on 401 did not raise')
+    except Exception:
+        pass
+
+    expected = calls(rTorrent(uri=xml_uri, decoder='stdlib'))
+    for decoder in ['auto', 'etree']:
+        for name, result in calls(rTorrent(uri=json_uri, protocol='jsonrpc', decoder=decoder)).items():
+            if strip(result) != strip(expected[name]):
+                failures.append(f'jsonrpc {decoder} {name}: {result!r:.200} != {expected[name]!r:.200}')
+
+    print(failures and '\n'.join(failures) or 'identical')
+    sys.exit(failures and 1 or 0)
@@ -0,0 +1,37 @@
+"""
+    Syncs a TorrentMirror from the XML-RPC stand-in server of check_jsonrpc, where only
+    some torrents have a ratio group, and checks the indexed queries,
+    exits with status 1 on any failure.
+        python -m benchmarks.check_mirror
+"""
+
+import sys
+from pyruTorrent import rTorrent, TorrentMirror
+from benchmarks.check_jsonrpc import HASHES, XMLServer, serve
+
+
+if __name__ == '__main__':
+    failures = []
+    xml_uri = serve(XMLServer(('127.0.0.1', 0), allow_none=True, logRequests=False))
+    mirror = TorrentMirror(rTorrent(uri=xml_uri))
+
+    # The stand-in puts hashes ending in 1 in rat_2 (ratio group 3), the rest in none
+    grouped = sorted(h for h in HASHES if h.endswith('1'))
+    counts = mirror.sync()
+    if counts != {'upserted': len(HASHES), 'deleted': 0, 'unchanged': 0}:
+        failures.append(f'first sync: {counts}')
+    counts = mirror.sync()
+    if counts != {'upserted': 0, 'deleted': 0, 'unchanged': len(HASHES)}:
+        failures.append(f'second sync: {counts}')
+
+    result = sorted(mirror.query(ratio_group=3))
+    if result != grouped:
+        failures.append(f'query(ratio_group=3): {result} != {grouped}')
+    result = sorted(mirror.query(where='ratio_group IS NULL'))
+    if result != sorted(set(HASHES) - set(grouped)):
+        failures.append(f'ungrouped: {len(result)} torrents, expected {len(HASHES) - len(grouped)}')
+    if mirror.query(ratio_group=1):
+        failures.append('query(ratio_group=1) is not empty')
+
+    print(failures and '\n'.join(failures) or 'ok')
+    sys.exit(failures and 1 or 0)
@@ -1 +1 @@
-from .pyruTorrent import rTorrent
\ No newline at end of file
+from .pyruTorrent import rTorrent, TorrentMirror, FileCatalogue, MutationScheduler, HashCheckQueue, MagnetUtils
\ No newline at end of file
@@ -20,14 +20,34 @@
 
 import xmlrpc.client
 import base64
+import csv
+import os
+import mmap
 import requests
 import json
 import time
 import re
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pprint import pformat
 import bencodepy
 from functools import wraps
 from hashlib import sha1
-from urllib.parse import quote, unquote
+from urllib.parse import quote, unquote, urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+from xml.etree import ElementTree
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 
 class Misc:
@@ -88,13 +108,595 @@ class BencodeUtils:
         
     def info_to_hash(self, info):
         return sha1(bencodepy.bencode(info)).hexdigest()
+        
+    def info_to_files(self, info):
+        """
+            Returns [(relative_path, size), ...] in the same form as rTorrent's f.path.
+        """
+        if 'files' in info:
+            return [('/'.join(f['path']), f['length']) for f in info['files']]
+        return [(info['name'], info['length'])]
+        
+    def add_fast_resume(self, obj, data_path, add_name_to_path=True):
+        """
+            Adds libtorrent_resume data to :obj: when every file exists under :data_path:
+            with the size given in the metainfo, rTorrent then skips the hash check on load.
+            Returns False and leaves :obj: unchanged if any file is missing or differs in size.
+        """
+        info = obj['info']
+        piece_length = info['piece length']
+        data_path = os.path.expanduser(data_path)
+        if add_name_to_path:
+            data_path = os.path.join(data_path, info['name'])
+        files = self.info_to_files(info)
+        resume_files = []
+        offset = 0
+        for path, size in files:
+            fp = 'files' in info and os.path.join(data_path, *path.split('/')) or data_path
+            if not os.path.isfile(fp) or os.path.getsize(fp) != size:
+                return False
+            resume_files.append({
+                'priority':     1,
+                'mtime':        int(os.path.getmtime(fp)),
+                'completed':    (offset + size + piece_length - 1) // piece_length - offset // piece_length
+            })
+            offset += size
+        obj['libtorrent_resume'] = {
+            'bitfield':                     len(info['pieces']) // 20,      # Piece count, marks every piece as complete
+            'files':                        resume_files,
+            'uncertain_pieces.timestamp':   int(time.time())
+        }
+        return True
+        
+    @staticmethod
+    def piece_length_for(total_size, max_pieces=2000):
+        """
+            Smallest power of two between 16KiB and 16MiB keeping the piece count under :max_pieces:.
+        """
+        piece_length = 2 ** 14
+        while piece_length < 2 ** 24 and total_size / piece_length > max_pieces:
+            piece_length *= 2
+        return piece_length
+        
+    @staticmethod
+    def hash_piece_range(files, piece_length, first, last):
+        """
+            Returns the concatenated sha1 digests of pieces [first, last) of :files: [(filepath, size), ...],
+            read through mmap so files are never loaded whole. Used as the process pool worker.
+        """
+        output = []
+        digest = sha1()
+        need = piece_length
+        pos = first * piece_length
+        end = last * piece_length
+        file_start = 0
+        for fp, size in files:
+            file_end = file_start + size
+            if size == 0 or file_end <= pos:
+                file_start = file_end
+                continue
+            if file_start >= end:
+                break
+            with open(fp, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m, memoryview(m) as mv:
+                offset = pos - file_start
+                while offset < size and pos < end:
+                    n = min(need, size - offset)
+                    digest.update(mv[offset:offset + n])
+                    offset += n
+                    pos += n
+                    need -= n
+                    if need == 0:
+                        output.append(digest.digest())
+                        digest = sha1()
+                        need = piece_length
+            file_start = file_end
+        if need != piece_length:
+            output.append(digest.digest())
+        return b''.join(output)
+        
+    def create(self, path, trackers=None, piece_length=None, private=False, comment=None, source=None, workers=None):
+        """
+            Builds metainfo for a file or directory, pieces are hashed in parallel by a process pool.
+                :trackers:      announce url or list of urls, one tier each
+                :piece_length:  chosen with piece_length_for() if None
+                :workers:       processes, defaults to the CPU count, 1 hashes in-process
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        name = os.path.basename(path)
+        if os.path.isdir(path):
+            files = []
+            for root, dirs, filenames in os.walk(path):
+                dirs.sort()
+                for filename in sorted(filenames):
+                    fp = os.path.join(root, filename)
+                    files.append((fp, os.path.getsize(fp)))
+        else:
+            files = [(path, os.path.getsize(path))]
+        total_size = sum([size for fp, size in files])
+        if total_size == 0:
+            raise ValueError(f'Cannot create torrent for "{path}", no data.')
+        piece_length = piece_length or self.piece_length_for(total_size)
+        n_pieces = (total_size + piece_length - 1) // piece_length
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or n_pieces < workers * 4:
+            pieces = self.hash_piece_range(files, piece_length, 0, n_pieces)
+        else:
+            step = max(1, n_pieces // (workers * 4))
+            ranges = [(i, min(i + step, n_pieces)) for i in range(0, n_pieces, step)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(BencodeUtils.hash_piece_range, files, piece_length, first, last) for first, last in ranges]
+                pieces = b''.join([f.result() for f in futures])
+        info = {'name': name, 'piece length': piece_length, 'pieces': pieces}
+        if os.path.isdir(path):
+            info['files'] = [{'length': size, 'path': os.path.relpath(fp, path).split(os.sep)} for fp, size in files]
+        else:
+            info['length'] = total_size
+        if private:
+            info['private'] = 1
+        if source:
+            info['source'] = source
+        obj = {'info': info, 'created by': 'pyruTorrent', 'creation date': int(time.time())}
+        if isinstance(trackers, str):
+            trackers = [trackers]
+        if trackers:
+            obj['announce'] = trackers[0]
+            obj['announce-list'] = [[t] for t in trackers]
+        if comment:
+            obj['comment'] = comment
+        return obj
+        
+    def to_obj(self, torrent):
+        """
+            :torrent: <bytes> | <path> | decoded metainfo dict
+        """
+        if isinstance(torrent, bytes):
+            return self.from_bytes(torrent)
+        elif isinstance(torrent, str):
+            return self.from_filepath(torrent)
+        return torrent
+
+
+class MagnetUtils:
+    """
+        Bulk magnet parsing, hashes are normalized to upper case hex like d.hash.
+            Example:
+                items, errors = MagnetUtils.parse_all(magnets)
+    """
+    
+    _hex_ = re.compile(r'^[0-9a-fA-F]{40}$')
+    _base32_ = re.compile(r'^[A-Za-z2-7]{32}$')
+    _btmh_ = re.compile(r'^1220[0-9a-fA-F]{64}$')
+    
+    @staticmethod
+    def parse(magnet):
+        """
+            Returns {'hash', 'hash_v2', 'name', 'trackers', 'magnet'}, raises ValueError.
+            Hybrid v1/v2 magnets are accepted, v2-only (btmh without btih) magnets are not
+            since rTorrent only handles v1 torrents.
+        """
+        if not isinstance(magnet, str) or not (magnet.startswith('magnet:') or 'xt=urn:' in magnet):
+            raise ValueError(f'Not a magnet link: {magnet!r}')
+        query = magnet.split('?', 1)[-1].strip()
+        _hash, hash_v2, name, trackers = None, None, None, []
+        for key, val in parse_qsl(query):
+            if key == 'xt' or key.startswith('xt.'):
+                if val.startswith('urn:btih:') and _hash is None:
+                    val = val[9:]
+                    if MagnetUtils._hex_.match(val):
+                        _hash = val.upper()
+                    elif MagnetUtils._base32_.match(val):
+                        _hash = base64.b32decode(val.upper().encode()).hex().upper()
+                    else:
+                        raise ValueError(f'Invalid btih "{val}" in magnet: {magnet}')
+                elif val.startswith('urn:btmh:') and hash_v2 is None:
+                    val = val[9:]
+                    if not MagnetUtils._btmh_.match(val):
+                        raise ValueError(f'Invalid btmh "{val}" in magnet: {magnet}')
+                    hash_v2 = val.lower()
+            elif key == 'dn' and name is None:
+                name = val
+            elif (key == 'tr' or key.startswith('tr.')) and val not in trackers:
+                trackers.append(val)
+        if _hash is None:
+            if hash_v2:
+                raise ValueError(f'v2-only magnet is not supported: {magnet}')
+            raise ValueError(f'Missing btih in magnet: {magnet}')
+        item = {'hash': _hash, 'hash_v2': hash_v2, 'name': name, 'trackers': trackers}
+        item['magnet'] = MagnetUtils.to_magnet(item)
+        return item
+        
+    @staticmethod
+    def to_magnet(item):
+        params = [('xt', f'urn:btih:{item["hash"]}')]
+        if item.get('hash_v2'):
+            params.append(('xt', f'urn:btmh:{item["hash_v2"]}'))
+        if item.get('name'):
+            params.append(('dn', item['name']))
+        params += [('tr', tr) for tr in item.get('trackers') or []]
+        return 'magnet:?' + urlencode(params, safe=':/', quote_via=quote)
+        
+    @staticmethod
+    def parse_all(magnets):
+        """
+            Parses :magnets:, duplicates by info-hash are merged (first name wins, trackers are combined).
+            Returns (items, errors), errors is a list of {'magnet', 'error'}.
+        """
+        items = {}
+        errors = []
+        for magnet in magnets:
+            try:
+                item = MagnetUtils.parse(magnet)
+            except ValueError as e:
+                errors.append({'magnet': magnet, 'error': str(e)})
+                continue
+            if item['hash'] not in items:
+                items[item['hash']] = item
+                continue
+            known = items[item['hash']]
+            trackers = known['trackers'] + [tr for tr in item['trackers'] if tr not in known['trackers']]
+            if trackers != known['trackers'] or (not known['name'] and item['name']) or (not known['hash_v2'] and item['hash_v2']):
+                known.update(
+                    name=known['name'] or item['name'],
+                    hash_v2=known['hash_v2'] or item['hash_v2'],
+                    trackers=trackers
+                )
+                known['magnet'] = MagnetUtils.to_magnet(known)
+        return list(items.values()), errors
+
+
+class XMLRPCDecoder:
+    """
+        Decodes XML-RPC responses without the pure-Python xmlrpc.client.Unmarshaller.
+        The XML-RPC markup is rewritten to JSON with a few str.replace passes and parsed by the C json
+        module (orjson if installed). Responses the rewrite does not cover (faults, base64, dateTime,
+        unexpected whitespace) fall back to an ElementTree walk.
+        With a method plan, system.multicall responses are mapped straight into the results
+        parse_method_response returns, only calling parse_result for keys that need converting.
+            :parser:    'auto' | 'etree' | 'stdlib'
+    """
+    
+    _parsers_ = ['auto', 'etree', 'stdlib']
+    
+    _json_replace_ = [
+        ('<array><data></data></array>',    '[]'),
+        ('<array><data/></array>',          '[]'),
+        ('<struct></struct>',               '{}'),
+        ('</value><value>',                 ','),
+        ('<array><data><value>',            '['),
+        ('</value></data></array>',         ']'),
+        ('<struct><member><name>',          '{"'),
+        ('</value></member><member><name>', ',"'),
+        ('</value></member></struct>',      '}'),
+        ('</name><value>',                  '":'),
+        ('<value>',                         ''),
+        ('</value>',                        ''),
+        ('<string>',                        '"'),
+        ('</string>',                       '"'),
+        ('<string/>',                       '""'),
+        ('<i8>',                            ''),
+        ('</i8>',                           ''),
+        ('<ex:i8>',                         ''),
+        ('</ex:i8>',                        ''),
+        ('<i4>',                            ''),
+        ('</i4>',                           ''),
+        ('<int>',                           ''),
+        ('</int>',                          ''),
+        ('<double>',                        ''),
+        ('</double>',                       ''),
+        ('<boolean>1</boolean>',            'true'),
+        ('<boolean>0</boolean>',            'false'),
+        ('<nil/>',                          'null'),
+        ('<ex:nil/>',                       'null'),
+    ]
+    
+    _untyped_ = re.compile(r'<value>([^<]*)</value>')
+    _char_ref_ = re.compile(r'&#(x[0-9a-fA-F]+|[0-9]+);')
+    
+    def __init__(self, parser='auto'):
+        if parser not in self._parsers_:
+            raise ValueError(f'Invalid parser "{parser}", must be one of {self._parsers_}.')
+        self.parser = parser
+        self.json_loads = orjson is not None and orjson.loads or (lambda s: json.loads(s, strict=False))
+        self.decoders = {
+            'string':       lambda e: e.text or '',
+            'i4':           lambda e: int(e.text),
+            'i8':           lambda e: int(e.text),
+            'int':          lambda e: int(e.text),
+            'boolean':      lambda e: e.text.strip() == '1',
+            'double':       lambda e: float(e.text),
+            'nil':          lambda e: None,
+            'base64':       lambda e: xmlrpc.client.Binary(base64.decodebytes((e.text or '').encode())),
+            'dateTime.iso8601': lambda e: xmlrpc.client.DateTime(e.text),
+            'array':        lambda e: [self.value(v) for v in e[0]],
+            'struct':       lambda e: {m.find('name').text: self.value(m.find('value')) for m in e},
+        }
+        for tag in ['i8', 'nil']:
+            self.decoders[f'{{http://ws.apache.org/xmlrpc/namespaces/extensions}}{tag}'] = self.decoders[tag]
+            
+    @staticmethod
+    def char_ref(match):
+        code = match.group(1)
+        return json.dumps(chr(code[0] == 'x' and int(code[1:], 16) or int(code)))[1:-1]
+        
+    def json_value(self, body):
+        """
+            Returns the decoded response value, None if the response can't be rewritten to JSON.
+        """
+        s = body.decode('utf-8')
+        start = s.find('<param>')
+        end = s.rfind('</param>')
+        if start < 0 or end < 0 or '<base64>' in s or '<dateTime.iso8601>' in s:
+            return None
+        s = s[start + len('<param>'):end]
+        # Line endings are normalized like expat does, char refs (&#13;) are decoded later and kept
+        if '\r' in s:
+            s = s.replace('\r\n', '\n').replace('\r', '\n')
+        if '\\' in s:
+            s = s.replace('\\', '\\\\')
+        if '"' in s:
+            s = s.replace('"', '\\"')
+        if self._untyped_.search(s):
+            s = self._untyped_.sub(r'<string>\1</string>', s)
+        # Content can't contain '<', so a newline before a tag is formatting unless it ends a string or name
+        s = s.replace('\n</string>', '\\n</string>').replace('\n</name>', '\\n</name>').replace('\n<', '<')
+        for old, new in self._json_replace_:
+            s = s.replace(old, new)
+        if '&' in s:
+            s = s.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '\\"').replace('&apos;', "'")
+            s = self._char_ref_.sub(self.char_ref, s)
+            s = s.replace('&amp;', '&')
+        try:
+            return (self.json_loads(s),)
+        except ValueError:
+            # orjson rejects raw control characters inside strings
+            try:
+                return (json.loads(s, strict=False),)
+            except ValueError:
+                return None
+        
+    def value(self, elem):
+        if len(elem) == 0:
+            return elem.text or ''
+        child = elem[0]
+        return self.decoders[child.tag](child)
+        
+    def loads(self, body):
+        """
+            Same return value as xmlrpc.client.loads(body)[0].
+        """
+        if self.parser == 'stdlib':
+            return xmlrpc.client.loads(body)[0]
+        if self.parser == 'auto':
+            result = self.json_value(body)
+            if result is not None:
+                return result
+        root = ElementTree.fromstring(body)
+        fault = root.find('fault')
+        if fault is not None:
+            raise xmlrpc.client.Fault(**self.value(fault.find('value')))
+        value = root.find('params/param/value')
+        return value is None and () or (self.value(value),)
+        
+    def decode_multicall(self, body, methods, count=1, strict=True):
+        """
+            Decodes a system.multicall response for :methods:, same output as
+            RPCMethodHelpers.parse_method_response(methods, response, count).
+        """
+        return self.map_multicall(methods, self.loads(body)[0], count=count, strict=strict)
+        
+    def map_multicall(self, methods, response, count=1, strict=True):
+        """
+            Maps an already decoded system.multicall :response: to per-key results.
+        """
+        if self.parser == 'stdlib':
+            return RPCMethodHelpers.parse_method_response(methods, response, count=count, strict=strict)
+        if strict and len(response) > 0 and isinstance(response[0], dict) and response[0].get('faultCode'):
+            raise Exception(f'Error in decode_multicall, error response:\n{pformat(response)}\n')
+        parse_result = RPCMethodHelpers.parse_result
+        special = RPCMethodHelpers._parsed_keys_
+        result_len = int(len(methods) / count)
+        result = []
+        idx = 0
+        for method, method_resp in zip(methods, response):
+            keys = method.get('keys')
+            if keys:
+                if len(method_resp) > 0:
+                    method_resp = method_resp[0]
+                # Keys without a parse_result conversion are copied as is unless they hold a list
+                plain = [k not in special for k in keys]
+                for row in method_resp:
+                    if len(row) > 0:
+                        result.append({k: v if p and v.__class__ is not list else parse_result(k, v) for k, p, v in zip(keys, plain, row)})
+                    else:
+                        result.append(parse_result(method['key'], row))
+            else:
+                if idx % result_len == 0:
+                    result.append({})
+                result[-1][method['key']] = parse_result(method['key'], method_resp)
+                idx += 1
+        return result
+
+
+class XMLRPCTransportMixin:
+    """
+        Parses responses with XMLRPCDecoder, with :raw: the undecoded body is returned instead.
+    """
+    
+    def __init__(self, decoder, raw=False, **kwargs):
+        super().__init__(**kwargs)
+        self.decoder = decoder
+        self.raw = raw
+        
+    def parse_response(self, response):
+        if self.decoder.parser == 'stdlib' and not self.raw:
+            return super().parse_response(response)
+        if response.getheader('Content-Encoding', '') == 'gzip':
+            stream = xmlrpc.client.GzipDecodedResponse(response)
+        else:
+            stream = response
+        body = stream.read()
+        if stream is not response:
+            stream.close()
+        if self.raw:
+            return (body,)
+        return self.decoder.loads(body)
+        
+    @staticmethod
+    def for_uri(uri, decoder, raw=False):
+        if uri.startswith('https'):
+            return XMLRPCSafeTransport(decoder, raw=raw)
+        return XMLRPCTransport(decoder, raw=raw)
+
+
+class XMLRPCTransport(XMLRPCTransportMixin, xmlrpc.client.Transport):
+    pass
+
+
+class XMLRPCSafeTransport(XMLRPCTransportMixin, xmlrpc.client.SafeTransport):
+    pass
+
+
+class JSONRPCMethod:
+    
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        
+    def __getattr__(self, name):
+        return JSONRPCMethod(self.client, f'{self.name}.{name}')
+        
+    def __call__(self, *params):
+        return self.client._call(self.name, params)
+
+
+class JSONRPCClient:
+    """
+        Drop-in for xmlrpc.client.ServerProxy against the JSON-RPC endpoint of newer rTorrent builds.
+        system.multicall is sent as a native JSON-RPC batch and returned in the XML-RPC multicall
+        shape, [result] per call or a faultCode/faultString dict, so parse_method_response works unchanged.
+        bytes params (load.raw) are sent base64 encoded.
+    """
+    
+    def __init__(self, uri, session=None, timeout=None):
+        self._uri = uri
+        self._session = session or requests.Session()
+        self._timeout = timeout
+        self._request_id = 0
+        
+    # Underscored attributes so rTorrent commands like session.* resolve through __getattr__
+    def __getattr__(self, name):
+        return JSONRPCMethod(self, name)
+        
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode()
+        elif isinstance(value, xmlrpc.client.Binary):
+            return base64.b64encode(value.data).decode()
+        elif isinstance(value, (list, tuple)):
+            return [JSONRPCClient._encode(v) for v in value]
+        elif isinstance(value, dict):
+            return {k: JSONRPCClient._encode(v) for k, v in value.items()}
+        return value
+        
+    @staticmethod
+    def _fault(error):
+        return {'faultCode': error.get('code'), 'faultString': error.get('message')}
+        
+    def _post(self, payload):
+        response = self._session.post(self._uri, data=json.dumps(payload), headers={'Content-Type': 'application/json'}, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json()
+        
+    def _call(self, method, params):
+        if method == 'system.multicall':
+            return self._multicall(*params)
+        self._request_id += 1
+        response = self._post({'jsonrpc': '2.0', 'id': self._request_id, 'method': method, 'params': self._encode(params)})
+        if response.get('error'):
+            raise xmlrpc.client.Fault(**self._fault(response['error']))
+        return response.get('result')
+        
+    def _multicall(self, methods):
+        if not methods:
+            return []
+        batch = [{'jsonrpc': '2.0', 'id': idx, 'method': m['methodName'], 'params': self._encode(m['params'])} for idx, m in enumerate(methods)]
+        response = self._post(batch)
+        if isinstance(response, dict):
+            raise xmlrpc.client.Fault(**self._fault(response.get('error') or {}))
+        response = {r.get('id'): r for r in response}
+        output = []
+        for idx in range(len(methods)):
+            item = response.get(idx) or {'error': {'code': -32603, 'message': 'No response for call'}}
+            output.append(item.get('error') and self._fault(item['error']) or [item.get('result')])
+        return output
 
 
 class rTorrentRPC:
     
-    def __init__(self, **kwargs):
+    _protocols_ = ['xmlrpc', 'jsonrpc', 'auto']
+    
+    # JSON-RPC error code for an unknown method
+    _method_not_found_ = -32601
+    
+    def __init__(self, protocol='xmlrpc', decoder='auto', session=None, timeout=30, **kwargs):
+        if protocol not in self._protocols_:
+            raise ValueError(f'Invalid protocol "{protocol}", must be one of {self._protocols_}.')
         self.rpc_uri = Misc.to_uri(**kwargs)
-        self.client = xmlrpc.client.ServerProxy(uri=self.rpc_uri, verbose=False, allow_none=True)
+        self.decoder = XMLRPCDecoder(decoder)
+        self.session = session
+        self.timeout = timeout
+        if protocol == 'auto':
+            protocol = self.negotiate_protocol()
+        self.protocol = protocol
+        if protocol == 'jsonrpc':
+            self.client = JSONRPCClient(self.rpc_uri, session=self.session, timeout=self.timeout)
+            return
+        self.client = xmlrpc.client.ServerProxy(uri=self.rpc_uri, transport=XMLRPCTransportMixin.for_uri(self.rpc_uri, self.decoder), verbose=False, allow_none=True)
+        self.raw_transport = XMLRPCTransportMixin.for_uri(self.rpc_uri, self.decoder, raw=True)
+        uri = urlsplit(self.rpc_uri)
+        self.rpc_host = uri.netloc
+        self.rpc_handler = urlunsplit(['', '', *uri[2:]]) or '/RPC2'
+        
+    def negotiate_protocol(self):
+        """
+            Sends one JSON-RPC call, uses XML-RPC if the answer isn't JSON or is a
+            JSON-RPC "method not found" error, JSON-RPC otherwise.
+            Connection, TLS, timeout and authentication errors are raised.
+        """
+        session = self.session or requests.Session()
+        payload = {'jsonrpc': '2.0', 'id': 0, 'method': 'system.client_version', 'params': []}
+        response = session.post(self.rpc_uri, data=json.dumps(payload), headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+        if response.status_code in [401, 403, 407]:
+            response.raise_for_status()
+        try:
+            body = response.json()
+        except ValueError:
+            return 'xmlrpc'
+        error = isinstance(body, dict) and body.get('error')
+        if error and error.get('code') == self._method_not_found_:
+            return 'xmlrpc'
+        if error:
+            raise xmlrpc.client.Fault(**JSONRPCClient._fault(error))
+        response.raise_for_status()
+        return 'jsonrpc'
+        
+    def multicall(self, methods, count=1, prefix=None, strict=True):
+        """
+            system.multicall decoded by the method plan,
+            same result as parse_method_response(methods, client.system.multicall(methods), count).
+            :prefix: methods sent first in the same request, their results are dropped.
+            :strict: raise if the first call returned a fault, with False faults are
+                returned in place, ex: for hashes that are no longer loaded.
+        """
+        prefix = prefix or []
+        if self.protocol == 'jsonrpc':
+            return self.decoder.map_multicall(methods, self.client.system.multicall(prefix + methods)[len(prefix):], count=count, strict=strict)
+        request = xmlrpc.client.dumps((prefix + methods,), 'system.multicall', allow_none=True).encode('utf-8', 'xmlcharrefreplace')
+        body = self.raw_transport.request(self.rpc_host, self.rpc_handler, request)[0]
+        if prefix:
+            return self.decoder.map_multicall(methods, self.decoder.loads(body)[0][len(prefix):], count=count, strict=strict)
+        return self.decoder.decode_multicall(body, methods, count=count, strict=strict)
 
 
 class RPCMethodHelpers:
@@ -103,6 +705,17 @@ class RPCMethodHelpers:
     def get(key, method, *args, **kwargs):
         return {'key': key, 'methodName': method, 'params': [*args], **kwargs}
         
+    @staticmethod
+    def is_fault(value):
+        return isinstance(value, dict) and 'faultCode' in value
+        
+    @staticmethod
+    def has_fault(item):
+        """
+            True if any value of a parsed result row is a multicall fault.
+        """
+        return RPCMethodHelpers.is_fault(item) or isinstance(item, dict) and any(RPCMethodHelpers.is_fault(v) for v in item.values())
+        
     def convert_d_multicall(methods=None, view=None, **kwargs):
         calls = []
         keys = []
@@ -148,8 +761,14 @@ class RPCMethodHelpers:
             return output
         return inner_func
         
+    # Keys parse_result converts, any other key is returned unchanged unless it holds a list
+    _parsed_keys_ = ['comment', 'seeding_time', 'ratio_group', 'ratio']
+        
     def parse_result(key, val):
         
+        if RPCMethodHelpers.is_fault(val):
+            return val
+        
         if isinstance(val, list) and len(val) == 1:
             val = val[0]
         
@@ -189,11 +808,11 @@ class RPCMethodHelpers:
             return output_multicall_d
         return RPCMethodHelpers.parse_result(method_key, method_response)
         
-    def parse_method_response(methods, response, count=1):
+    def parse_method_response(methods, response, count=1, strict=True):
         result_len = int(len(methods) / count)
         result = []
         
-        if len(response) > 0 and isinstance(response[0], dict) and response[0].get('faultCode'):
+        if strict and len(response) > 0 and isinstance(response[0], dict) and response[0].get('faultCode'):
             raise Exception(f'Error in parse_method_response, error response:\n{pformat(response)}\n')
         idx = 0
         result_idx = -1
@@ -213,6 +832,27 @@ class RPCMethodHelpers:
                 idx += 1
         return result
         
+    def parse_scan_response(methods, response, index_key):
+        """
+            Flattens a scan() d.multicall2 response into columns keyed by :index_key:
+                {<index_val>: {'hash': [...], <key>: [...], ...}}
+        """
+        if len(response) > 0 and isinstance(response[0], dict) and response[0].get('faultCode'):
+            raise Exception(f'Error in parse_scan_response, error response:\n{pformat(response)}\n')
+        keys = methods[0]['keys']
+        output = {}
+        for _hash, rows in response and response[0] and response[0][0] or []:
+            for row in rows:
+                item = dict(zip(keys, row))
+                columns = output.get(item[index_key])
+                if columns is None:
+                    columns = output[item[index_key]] = {k: [] for k in ['hash', *keys] if k != index_key}
+                columns['hash'].append(_hash)
+                for k, v in item.items():
+                    if k != index_key:
+                        columns[k].append(v)
+        return output
+        
     def parse_ratio_group(ratio_group):
         grp_idx_min = 1
         grp_idx_max = 8
@@ -265,6 +905,7 @@ class KeyMaps:
         'latest_sum_peers':     't.latest_sum_peers=',
         '_meta_': {
                                 'group_name': 'trackers',
+                                'call': 't.multicall=',
                                 'methods': [],
                                 'keys': []
         }
@@ -278,9 +919,11 @@ class KeyMaps:
         'priority':             'f.priority=',
         'chunks_completed':     'f.completed_chunks=',
         'chunks_total':         'f.size_chunks=',
+        'size':                 'f.size_bytes=',
         'is_complete':          'equal=f.size_chunks=,f.completed_chunks=',
         '_meta_': {
                                 'group_name': 'files',
+                                'call': 'f.multicall=',
                                 'methods': [],
                                 'keys': []
         }
@@ -304,6 +947,7 @@ class KeyMaps:
         'is_banned':            'p.banned=',
         '_meta_': {
                                 'group_name': 'peers',
+                                'call': 'p.multicall=',
                                 'methods': [],
                                 'keys': []
         }
@@ -385,30 +1029,56 @@ class RPCMethods(RPCMethodHelpers):
         
     def get_all_torrents(view='', **kwargs):
         return RPCMethodHelpers.convert_d_multicall(methods=RPCMethods.get_torrent(None, **kwargs), view=view, **kwargs)
+        
+    def scan(group_name, keys=None, view='', **kwargs):
+        """
+            Single d.multicall2 returning only the hash plus the
+            :keys: columns of a KeyMaps group for every torrent in :view:.
+        """
+        _map_ = KeyMaps._maps_[group_name]
+        keys = keys or _map_['_meta_']['keys']
+        if isinstance(kwargs.get('ratio_group'), (str, int)):
+            view = RPCMethodHelpers.parse_ratio_group(kwargs.get('ratio_group'))
+        call = ','.join([_map_['_meta_']['call'], *[_map_[k] for k in keys]])
+        return list([RPCMethodHelpers.get(group_name, 'd.multicall2', '', view or '', 'd.hash=', call, keys=keys)])
     
-    @RPCMethodHelpers.formatter
-    def ratio_group_set(_hash, new_ratio_group):
-        return {
-            'd.views.push_back_unique': ('d.views.push_back_unique', _hash, new_ratio_group),
-            'view.set_visible':         ('view.set_visible', _hash, new_ratio_group),
-        }
+    _ratio_group_clear_ = 'pyruTorrent.ratio_group.clear'
+    _ratio_group_assign_ = 'pyruTorrent.ratio_group.assign'
+    
+    def ratio_group_methods():
+        """
+            Server-side methods so a ratio group is assigned with a single command per torrent,
+            without first reading the torrent's current ratio group.
+            Sent ahead of every assignment in the same request (rTorrent forgets them on restart),
+            the fault method.insert returns for existing keys is ignored.
+        """
+        clear = ';'.join([f'view.set_not_visible=rat_{i};d.views.remove=rat_{i}' for i in range(8)])
+        assign = f'{RPCMethods._ratio_group_clear_}=;d.views.push_back_unique=$argument.0=;view.set_visible=$argument.0='
+        return [
+            RPCMethodHelpers.get(RPCMethods._ratio_group_clear_, 'method.insert', '', RPCMethods._ratio_group_clear_, 'simple', clear),
+            RPCMethodHelpers.get(RPCMethods._ratio_group_assign_, 'method.insert', '', RPCMethods._ratio_group_assign_, 'simple', assign)
+        ]
     
     @RPCMethodHelpers.formatter
-    def ratio_group_remove(_hash, old_ratio_group):
+    def ratio_group_assign(_hash, new_ratio_group, **kwargs):
         return {
-            'view.set_not_visible': ('view.set_not_visible', _hash, old_ratio_group),
-            'd.views.remove': ('d.views.remove', _hash, old_ratio_group),
+            'hash':                 ('d.hash', _hash),
+            'ratio_group':          new_ratio_group and (RPCMethods._ratio_group_assign_, _hash, new_ratio_group) or (RPCMethods._ratio_group_clear_, _hash),
         }
+        
+    def ratio_group_assign_all(new_ratio_group, view='', **kwargs):
+        return RPCMethodHelpers.convert_d_multicall(methods=RPCMethods.ratio_group_assign(None, new_ratio_group), view=view, **kwargs)
     
     @RPCMethodHelpers.formatter
-    def ratio_group_replace(_hash, old_ratio_group, new_ratio_group):
+    def label_set(_hash, label, **kwargs):
         return {
-            'view.set_not_visible': ('view.set_not_visible', _hash, old_ratio_group),
-            'd.views.remove': ('d.views.remove', _hash, old_ratio_group),
-            'd.views.push_back_unique': ('d.views.push_back_unique', _hash, new_ratio_group),
-            'view.set_visible': ('view.set_visible', _hash, new_ratio_group)
+            'hash':                 ('d.hash', _hash),
+            'label':                ('d.custom1.set', _hash, label),
         }
         
+    def label_set_all(label, view='', **kwargs):
+        return RPCMethodHelpers.convert_d_multicall(methods=RPCMethods.label_set(None, label), view=view, **kwargs)
+    
     @RPCMethodHelpers.formatter
     def events_get(only_keys=None):
         return {
@@ -516,6 +1186,26 @@ class RPCMethods(RPCMethodHelpers):
             'd.check_hash':         ('d.check_hash', _hash),
         }
 
+    @RPCMethodHelpers.formatter
+    def hash_check_start(_hash, failed_key, **kwargs):
+        return {
+            'hash':                 ('d.hash', _hash),
+            'failed':               ('d.custom.set', _hash, failed_key, ''),
+            'd.check_hash':         ('d.check_hash', _hash),
+        }
+
+    @RPCMethodHelpers.formatter
+    def hash_check_status(_hash, failed_key, **kwargs):
+        return {
+            'hash':                 ('d.hash', _hash),
+            'hashing':              ('d.hashing', _hash),
+            'hashing_checking':     ('d.is_hash_checking', _hash),
+            'chunks_hashed':        ('d.chunks_hashed', _hash),
+            'chunks_total':         ('d.size_chunks', _hash),
+            'is_complete':          ('d.complete', _hash),
+            'failed':               ('d.custom', _hash, failed_key),
+        }
+
     @RPCMethodHelpers.formatter
     def remove(_hash, **kwargs):
         return {
@@ -636,8 +1326,13 @@ class RPCMethods(RPCMethodHelpers):
 
 class Torrent():
     
-    def add_torrent(self, torrent_item, download_path=None, label=None, ratio_group=None, add_stopped=False, add_name_to_path=True, save_uploaded_torrent=False):
+    def add_torrent(self, torrent_item, download_path=None, label=None, ratio_group=None, add_stopped=False, add_name_to_path=True, save_uploaded_torrent=False, fast_resume=False, data_path=None, strict=True):
         """
+           :strict: with False, torrents rTorrent refused are returned as fault dicts instead of raising
+           :fast_resume: embed libtorrent resume data for torrents whose files already exist
+                with the right sizes, so they start seeding without a hash check.
+                Files are checked locally under :data_path: (defaults to :download_path:),
+                torrents with missing data are added without resume data.
            :torrent_item: accepts multiple formats
                 Ex: <bytes>     | [<bytes>]     | [<bytes>, <bytes>, <bytes>...]
                 Ex: <magnet>    | [<magnet>]    | [<magnet>, <magnet>, <magnet>...]
@@ -646,6 +1341,7 @@ class Torrent():
                 <magnet>    the magnet url
                 <path>      local filepath to .torrent file
                 <bytes>     byte contents of a .torrent file
+                <dict>      decoded metainfo, ex: from create_torrent()
             Not recommended to send more than 80 torrents at a time.
             Failiure happens when sending around 100 torrents at once.
         """
@@ -671,39 +1367,75 @@ class Torrent():
             t_label = quote(label or '')
             t_ratio_group = RPCMethods.parse_ratio_group(ratio_group)
 
-            if isinstance(torrent, str) and (torrent.startswith('magnet') or 'xt=urn:btih:' in torrent):
-                t_hash = torrent.split('btih:', 1)
-                t_hash = len(t_hash) == 2 and t_hash[1].split('&', 1)[0]
-                if isinstance(t_hash, str) and len(t_hash) in [32, 40]:
-                    is_magnet = True
-                    t_magnet = torrent
-                else:
-                    raise ValueError('Magnet parse error,', f'failed to parse magnet: {torrent}')
+            if isinstance(torrent, str) and (torrent.startswith('magnet') or 'xt=urn:' in torrent):
+                is_magnet = True
+                t_hash = MagnetUtils.parse(torrent)['hash']
+                t_magnet = torrent
             elif isinstance(torrent, str):
                 is_filepath = True
                 t_obj = self.bencode.from_filepath(torrent)
             elif isinstance(torrent, bytes):
                 is_bytes = True
                 t_obj = self.bencode.from_bytes(torrent)
+            elif isinstance(torrent, dict):
+                is_bytes = True
+                t_obj = torrent
             
+            if t_path is None:
+                t_path = download_path = self.get_download_directory() or '~/torrents/downloads'
+                
             if t_obj:
                 t_hash = self.bencode.info_to_hash(t_obj['info'])
+                if fast_resume:
+                    self.bencode.add_fast_resume(t_obj, data_path or t_path, add_name_to_path)
                 t_data = self.bencode.to_bytes(t_obj)
                 t_comment = quote(t_obj.get('comment') or '')
                 t_name = t_obj.get('info', {}).get('name')
             
-            if isinstance(t_hash, str) and len(t_hash) == 32:
-                    t_hash = base64.b32decode(t_hash.encode()).hex()
-                    
-            if t_path is None:
-                t_path = self.get_download_directory() or '~/torrents/downloads'
-                
             if is_magnet:
                 methods += RPCMethods.torrent_add_magnet(t_hash, t_magnet, t_label, t_path, t_ratio_group, add_stopped, add_name_to_path, save_uploaded_torrent)
             elif is_filepath or is_bytes:
                 methods += RPCMethods.torrent_add_file(t_hash, t_data, t_name, t_comment, t_label, t_path, t_ratio_group, add_stopped, add_name_to_path, save_uploaded_torrent)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(torrent_list))
+        return self.multicall(methods, count=len(torrent_list), strict=strict)
+
+    def add_magnets(self, magnets, chunk_size=80, **kwargs):
+        """
+            Adds a large list of magnets, parsed and deduplicated by MagnetUtils.parse_all
+            and sent :chunk_size: magnets per request, :kwargs: are passed to add_torrent.
+            Chunks are bounded by link count, not encoded size, the default stays under the
+            ~100 torrents per request where add_torrent starts failing.
+            Bad links, links rTorrent refused and failed chunks are collected instead of raised.
+            Returns {'added': [{'hash', 'magnet'}], 'errors': [{'magnet', 'error'}]}
+        """
+        items, errors = MagnetUtils.parse_all(magnets)
+        added = []
+        if items and kwargs.get('download_path') is None:
+            kwargs['download_path'] = self.get_download_directory() or '~/torrents/downloads'
+        for idx in range(0, len(items), chunk_size):
+            chunk = items[idx:idx + chunk_size]
+            try:
+                results = self.add_torrent([item['magnet'] for item in chunk], strict=False, **kwargs)
+            except Exception as e:
+                errors += [{'magnet': item['magnet'], 'error': str(e)} for item in chunk]
+                continue
+            for item, result in zip(chunk, results):
+                if RPCMethodHelpers.has_fault(result):
+                    fault = next(v for v in result.values() if RPCMethodHelpers.is_fault(v))
+                    errors.append({'magnet': item['magnet'], 'error': fault.get('faultString')})
+                else:
+                    added.append({'hash': item['hash'], 'magnet': item['magnet']})
+        return {'added': added, 'errors': errors}
+
+    def create_torrent(self, path, trackers=None, piece_length=None, private=False, comment=None, source=None, workers=None, add=False, **kwargs):
+        """
+            Creates a .torrent for a local file or directory, see BencodeUtils.create().
+            Returns {'hash': <info-hash>, 'data': <bytes>}, or with :add: the add_torrent
+            response, :kwargs: are passed on to add_torrent.
+        """
+        obj = self.bencode.create(path, trackers=trackers, piece_length=piece_length, private=private, comment=comment, source=source, workers=workers)
+        if add:
+            return self.add_torrent(obj, **kwargs)
+        return {'hash': self.bencode.info_to_hash(obj['info']), 'data': self.bencode.to_bytes(obj)}
 
     def start(self, hashes):
         methods = []
@@ -711,8 +1443,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.start(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
         
     def pause(self, hashes):
         methods = []
@@ -720,8 +1451,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.pause(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
         
     def unpause(self, hashes):
         methods = []
@@ -729,8 +1459,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.unpause(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
 
     def stop(self, hashes):
         methods = []
@@ -738,8 +1467,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.stop(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
 
     def check_hash(self, hashes):
         methods = []
@@ -747,8 +1475,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.check_hash(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
         
     def remove(self, hashes):
         methods = []
@@ -756,8 +1483,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.remove(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
         
     def remove_and_delete(self, hashes):
         methods = []
@@ -765,8 +1491,7 @@ class Torrent():
             hashes = [hashes]
         for _hash in hashes:
             methods += RPCMethods.remove_and_delete(_hash)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=len(hashes))
+        return self.multicall(methods, count=len(hashes))
         
     def start_all(self, view='default', ratio_group=None):
         """
@@ -777,44 +1502,37 @@ class Torrent():
         """
         methods = []
         methods += RPCMethods.start_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
         
     def pause_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.pause_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
         
     def unpause_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.unpause_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
 
     def stop_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.stop_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
 
     def check_hash_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.check_hash_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
         
     def remove_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.remove_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
         
     def remove_and_delete_all(self, view='default', ratio_group=None):
         methods = []
         methods += RPCMethods.remove_and_delete_all(view=view, ratio_group=ratio_group)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=1)
+        return self.multicall(methods, count=1)
 
     # def remove_and_delete_parent_contents_all(view='default', ratio_group=None):
         # methods = []
@@ -832,8 +1550,9 @@ class Torrent():
             include_peers=include_peers
         )[0]
         
-    def get_torrents(self, hashes=None, ratio_group=None, include_trackers=False, include_files=False, include_peers=False, **kwargs):
+    def get_torrents(self, hashes=None, ratio_group=None, include_trackers=False, include_files=False, include_peers=False, strict=True, **kwargs):
         """
+            :strict: with False, :hashes: that are not loaded return fault dicts instead of raising
             Note:
                 With include_trackers, include_files & include_peers enabled,
                 response sent from RPC will be double or more in size, depending on
@@ -861,34 +1580,125 @@ class Torrent():
                 methods += RPCMethods.get_torrent(_hash=_hash, **kwargs)
         else:
             methods = RPCMethods.get_all_torrents(ratio_group=ratio_group, **kwargs)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response, count=hashes and len(hashes) or len(methods))
+        return self.multicall(methods, count=hashes and len(hashes) or len(methods), strict=strict)
         
+    def scan_trackers(self, keys=None, view='default', ratio_group=None):
+        """
+            Trackers of every torrent in one lightweight call, column-oriented by tracker url.
+                :keys: subset of KeyMaps._tracker_map_ keys, all if None
+            Example:
+                {'udp://tracker.example.org:1337/announce': {'hash': [...], 'scrape_complete': [...], ...}}
+        """
+        return self.scan('trackers', 'url', keys=keys, view=view, ratio_group=ratio_group)
+        
+    def scan_peers(self, keys=None, view='default', ratio_group=None):
+        """
+            Connected peers of every torrent in one lightweight call, column-oriented by peer address.
+                :keys: subset of KeyMaps._peer_map_ keys, all if None
+        """
+        return self.scan('peers', 'address', keys=keys, view=view, ratio_group=ratio_group)
+        
+    def scan(self, group_name, index_key, keys=None, view='default', ratio_group=None):
+        if keys is not None and index_key not in keys:
+            keys = [index_key, *keys]
+        methods = RPCMethods.scan(group_name, keys=keys, view=view, ratio_group=ratio_group)
+        response = self.client.system.multicall(methods)
+        return RPCMethods.parse_scan_response(methods, response, index_key)
+
+    def get_torrents_pages(self, page_size=500, view='default', ratio_group=None, **kwargs):
+        """
+            Yields get_torrents results :page_size: torrents at a time, :kwargs: are passed to get_torrents.
+            Pages are fetched by hash with one command per key and torrent, so memory stays bounded
+            but rTorrent does more work than for a single d.multicall2; with :page_size: None the
+            whole view is fetched with one d.multicall2 and yielded as one page.
+            Torrents removed after the hash list was fetched are skipped.
+        """
+        if page_size is None:
+            yield self.get_torrents(view=view, ratio_group=ratio_group, **kwargs)
+            return
+        hashes = self.get_hashes(view=view, ratio_group=ratio_group)
+        for idx in range(0, len(hashes), page_size):
+            page = self.get_torrents(hashes=hashes[idx:idx + page_size], strict=False, **kwargs)
+            yield [t for t in page if not RPCMethodHelpers.has_fault(t)]
+            
+    def export_torrents(self, path, format='jsonl', page_size=500, view='default', ratio_group=None, include_trackers=False, include_files=False, include_peers=False, **kwargs):
+        """
+            Streams get_torrents pages into :path: directory, one table per file:
+                torrents.<ext>, and trackers.<ext>, files.<ext>, peers.<ext> when included,
+                child rows are keyed by the torrent's hash.
+            :format: 'jsonl' | 'csv' | 'parquet' (requires pyarrow)
+            :page_size: see get_torrents_pages, only one page is held in memory at a time.
+            Returns row counts per table.
+        """
+        writer_cls = TableWriter.for_format(format)
+        groups = [g for g, include in [('trackers', include_trackers), ('files', include_files), ('peers', include_peers)] if include]
+        os.makedirs(path, exist_ok=True)
+        writers = {table: writer_cls(os.path.join(path, f'{table}.{format}')) for table in ['torrents', *groups]}
+        try:
+            for page in self.get_torrents_pages(page_size=page_size, view=view, ratio_group=ratio_group, include_trackers=include_trackers, include_files=include_files, include_peers=include_peers, **kwargs):
+                tables = TableWriter.flatten(page, groups)
+                for table, rows in tables.items():
+                    writers[table].write(rows)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return {table: writer.count for table, writer in writers.items()}
+
+    def get_hashes(self, view='default', ratio_group=None):
+        methods = RPCMethods.get_all_torrents(view=view, ratio_group=ratio_group, only_keys=['hash'])
+        return [t['hash'] for t in self.multicall(methods)]
+
     def remove_ratio_group(self, hashes):
         return self.set_ratio_group(hashes, None)
 
     def set_ratio_group(self, hashes, ratio_group):
-        current = self.get_torrents(hashes=hashes, only_keys=['hash', 'ratio_group'])
+        """
+            Sent as one command per torrent in a single request,
+            any current ratio group is replaced server-side.
+        """
         methods = []
+        if isinstance(hashes, str):
+            hashes = [hashes]
         ratio_group = RPCMethods.parse_ratio_group(ratio_group)
-        for torrent in current:
-            current_hash = torrent.get('hash')
-            current_ratio_group = RPCMethods.parse_ratio_group(torrent.get('ratio_group'))
-            if not current_hash:
-                continue
-            if ratio_group and not current_ratio_group:
-                methods += RPCMethods.ratio_group_set(current_hash, ratio_group)
-            elif ratio_group and current_ratio_group:
-                methods += RPCMethods.ratio_group_replace(current_hash, current_ratio_group, ratio_group)
-            elif ratio_group is None and current_ratio_group:
-                methods += RPCMethods.ratio_group_remove(current_hash, current_ratio_group)
-        resp = self.client.system.multicall(methods)
-        return resp
+        for _hash in hashes:
+            methods += RPCMethods.ratio_group_assign(_hash, ratio_group)
+        return self.multicall(methods, count=len(hashes), prefix=RPCMethods.ratio_group_methods())
+        
+    def remove_ratio_group_all(self, view='default', ratio_group=None):
+        return self.set_ratio_group_all(None, view=view, ratio_group=ratio_group)
+        
+    def set_ratio_group_all(self, new_ratio_group, view='default', ratio_group=None):
+        """
+            Assigns :new_ratio_group: to every torrent in :view: (or current :ratio_group:)
+            with one d.multicall2.
+        """
+        methods = []
+        methods += RPCMethods.ratio_group_assign_all(RPCMethods.parse_ratio_group(new_ratio_group), view=view, ratio_group=ratio_group)
+        return self.multicall(methods, count=1, prefix=RPCMethods.ratio_group_methods())
+        
+    def set_label(self, hashes, label):
+        methods = []
+        if isinstance(hashes, str):
+            hashes = [hashes]
+        for _hash in hashes:
+            methods += RPCMethods.label_set(_hash, quote(label or ''))
+        return self.multicall(methods, count=len(hashes))
+        
+    def set_label_all(self, label, view='default', ratio_group=None):
+        methods = []
+        methods += RPCMethods.label_set_all(quote(label or ''), view=view, ratio_group=ratio_group)
+        return self.multicall(methods, count=1)
 
 
 class rTorrent(rTorrentRPC, Torrent):
 
-    def __init__(self, uri=None, scheme='https', host=None, port=None, username=None, password=None, rpc_path='/rutorrent'):
+    def __init__(self, uri=None, scheme='https', host=None, port=None, username=None, password=None, rpc_path='/rutorrent', decoder='auto', protocol='xmlrpc', session=None, timeout=30):
+        """
+            :decoder: XML-RPC response parser, 'auto' | 'etree' | 'stdlib', see XMLRPCDecoder
+            :protocol: 'xmlrpc' | 'jsonrpc' | 'auto', 'auto' uses JSON-RPC when the endpoint supports it
+            :session: requests.Session used for JSON-RPC and protocol negotiation, ex: for client certificates
+            :timeout: seconds, for JSON-RPC requests and protocol negotiation
+        """
         self.config = dict(
             uri=uri,
             scheme=scheme,
@@ -899,7 +1709,21 @@ class rTorrent(rTorrentRPC, Torrent):
             rpc_path=rpc_path
         )
         self.bencode = BencodeUtils()
-        super().__init__(**self.config)
+        self.settings_cache = {}
+        super().__init__(protocol=protocol, decoder=decoder, session=session, timeout=timeout, **self.config)
+
+    def clone(self):
+        """
+            New client with the same settings and its own connection, for use from another thread.
+            A :session: is copied (headers, auth, verify, cert, proxies), not shared.
+        """
+        session = None
+        if self.session is not None:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            session.proxies.update(self.session.proxies)
+            session.auth, session.verify, session.cert = self.session.auth, self.session.verify, self.session.cert
+        return rTorrent(**self.config, decoder=self.decoder.parser, protocol=self.protocol, session=session, timeout=self.timeout)
 
     def exec_shell(self, cmd):
         resp = self.client.execute.capture('', ['sh', '-v', '-c', f'{cmd}']).strip()
@@ -916,23 +1740,40 @@ class rTorrent(rTorrentRPC, Torrent):
     
     def remove_event(self, event, name):
         methods = RPCMethods.events_remove(event, name)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response)
+        return self.multicall(methods)
 
     def set_event(self, event, name, method):
         methods = RPCMethods.events_set(event, name, method)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response)
+        return self.multicall(methods)
         
     def get_events(self, only_keys=None):
         methods = RPCMethods.events_get(only_keys=only_keys)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response)[0]
+        return self.multicall(methods)[0]
         
-    def get_settings(self, only_keys=None):
-        methods = RPCMethods.get_settings(only_keys=only_keys)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response)[0]
+    def get_settings(self, only_keys=None, max_age=None):
+        """
+            :max_age: seconds, settings cached more recently than this are not fetched again,
+                None always fetches.
+            Keys missing from RPCMethods.get_settings are read with get_<key>,
+            settings that can't be read are returned as fault dicts and not cached.
+        """
+        if isinstance(only_keys, str):
+            only_keys = [only_keys]
+        known = RPCMethods.get_settings.__wrapped__()
+        keys = only_keys or list(known.keys())
+        now = time.time()
+        stale = [k for k in keys if max_age is None or k not in self.settings_cache or now - self.settings_cache[k][1] > max_age]
+        faults = {}
+        if stale:
+            methods = [k for k in stale if k in known] and RPCMethods.get_settings(only_keys=[k for k in stale if k in known]) or []
+            methods += [RPCMethodHelpers.get(k, f'get_{k}', '') for k in stale if k not in known]
+            for setting_key, setting_val in self.multicall(methods, strict=False)[0].items():
+                if RPCMethodHelpers.is_fault(setting_val):
+                    self.settings_cache.pop(setting_key, None)
+                    faults[setting_key] = setting_val
+                else:
+                    self.settings_cache[setting_key] = (setting_val, now)
+        return {k: k in faults and faults[k] or self.settings_cache[k][0] for k in keys if k in faults or k in self.settings_cache}
         
     def set_settings(self, settings, only_keys=None):
         """
@@ -941,8 +1782,64 @@ class rTorrent(rTorrentRPC, Torrent):
                     {'min_peers': 1, 'max_peers': 200}
         """
         methods = RPCMethods.set_settings(settings, only_keys=only_keys)
-        response = self.client.system.multicall(methods)
-        return RPCMethods.parse_method_response(methods, response)[0]
+        result = self.multicall(methods)[0]
+        for m in methods:
+            self.settings_cache.pop(m['key'], None)
+        return result
+        
+    @staticmethod
+    def normalize_setting(val):
+        if isinstance(val, bool):
+            return int(val)
+        if val is None:
+            return ''
+        n = Misc.parseNumber(val)
+        return str(val) if n is None else n
+        
+    def reconcile_settings(self, desired, max_age=None, dry_run=False):
+        """
+            Compares :desired: settings against the (cached) current settings and only sends
+            the ones that differ, in a single multicall.
+            :desired: setting_key, setting_val dict, same format as set_settings
+            :dry_run: only report drift
+            Returns the drift, {'max_peers': {'current': 100, 'desired': 200}},
+            settings rTorrent refused also hold the 'error' and are not cached as applied.
+        """
+        desired = {(k.startswith(('set_', 'get_')) and k[4:] or k): v for k, v in desired.items()}
+        current = self.get_settings(only_keys=list(desired.keys()), max_age=max_age)
+        drift = {}
+        for setting_key, setting_val in desired.items():
+            current_val = current.get(setting_key)
+            if RPCMethodHelpers.is_fault(current_val):
+                current_val = None
+            if current_val is None or self.normalize_setting(current_val) != self.normalize_setting(setting_val):
+                drift[setting_key] = {'current': current_val, 'desired': setting_val}
+        if drift and not dry_run:
+            methods = RPCMethods.set_settings({k: v['desired'] for k, v in drift.items()})
+            result = self.multicall(methods, strict=False)[0]
+            now = time.time()
+            for setting_key, v in drift.items():
+                if RPCMethodHelpers.is_fault(result.get(setting_key)):
+                    v['error'] = result[setting_key].get('faultString')
+                    self.settings_cache.pop(setting_key, None)
+                else:
+                    self.settings_cache[setting_key] = (v['desired'], now)
+        return drift
+        
+    @staticmethod
+    def reconcile_settings_all(clients, desired, max_age=None, dry_run=False, max_workers=8):
+        """
+            Runs reconcile_settings on many rTorrent :clients: concurrently.
+            Returns a list of <drift> | <Exception> in the same order as :clients:,
+            one failing host does not stop the others.
+        """
+        def reconcile(client):
+            try:
+                return client.reconcile_settings(desired, max_age=max_age, dry_run=dry_run)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(reconcile, clients))
         
     def get_max_xmlrpc_size_limit_in_MB(self):
         return round(self.client.network.xmlrpc.size_limit() / 2**10 / 2**10)
@@ -963,3 +1860,826 @@ class rTorrent(rTorrentRPC, Torrent):
     def get_download_directory(self):
         return self.client.directory.default()
 
+
+class TorrentMirror:
+    """
+        Persistent SQLite mirror of get_torrents output, including trackers and files.
+        Syncs are incremental, rows are only rewritten when a torrent changed and
+        torrents no longer loaded in rTorrent are deleted by hash.
+            Example:
+                mirror = TorrentMirror(rt, 'torrents.db')
+                mirror.sync()
+                hashes = mirror.query(tracker='tracker.example.org', ratio_below=1, older_than_days=30)
+                rt.remove(hashes)
+    """
+    
+    _columns_ = {
+        'name':                 'TEXT',
+        'label':                'TEXT',
+        'ratio':                'REAL',
+        'ratio_group':          'INTEGER',
+        'state':                'INTEGER',
+        'is_complete':          'INTEGER',
+        'is_private':           'INTEGER',
+        'bytes_total':          'INTEGER',
+        'bytes_done':           'INTEGER',
+        'base_path':            'TEXT',
+        'timestamp_added':      'INTEGER',
+        'timestamp_finished':   'INTEGER',
+    }
+    
+    # Change on every call, left out of the stored snapshot so idle torrents are not rewritten on sync.
+    _volatile_keys_ = ['seeding_time', 'upload_speed', 'download_speed', 'peers_connected', 'peers_not_connected',
+                       'peers_accounted', 'peers_complete', 'state_changed']
+    _volatile_tracker_keys_ = ['scrape_time_last', 'is_busy', 'latest_event', 'latest_new_peers', 'latest_sum_peers']
+    
+    def __init__(self, rt, path=':memory:'):
+        self.rt = rt
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.create_tables()
+        
+    def create_tables(self):
+        columns = ''.join([f'{k} {v}, ' for k, v in self._columns_.items()])
+        self.db.executescript(f'''
+            CREATE TABLE IF NOT EXISTS torrents (hash TEXT PRIMARY KEY, {columns}data TEXT, digest TEXT, synced INTEGER);
+            CREATE TABLE IF NOT EXISTS trackers (hash TEXT, url TEXT, host TEXT, is_enabled INTEGER, scrape_complete INTEGER, scrape_incomplete INTEGER, failed_counter INTEGER, success_counter INTEGER);
+            CREATE TABLE IF NOT EXISTS files (hash TEXT, path TEXT, size INTEGER, is_complete INTEGER);
+            CREATE INDEX IF NOT EXISTS idx_torrents_label ON torrents (label);
+            CREATE INDEX IF NOT EXISTS idx_torrents_ratio ON torrents (ratio);
+            CREATE INDEX IF NOT EXISTS idx_torrents_ratio_group ON torrents (ratio_group);
+            CREATE INDEX IF NOT EXISTS idx_torrents_timestamp_added ON torrents (timestamp_added);
+            CREATE INDEX IF NOT EXISTS idx_trackers_hash ON trackers (hash);
+            CREATE INDEX IF NOT EXISTS idx_trackers_host ON trackers (host);
+            CREATE INDEX IF NOT EXISTS idx_trackers_url ON trackers (url);
+            CREATE INDEX IF NOT EXISTS idx_files_hash ON files (hash);
+            CREATE INDEX IF NOT EXISTS idx_files_path ON files (path);
+            CREATE INDEX IF NOT EXISTS idx_files_size ON files (size);
+        ''')
+        # Mirrors created before the digest column
+        if 'digest' not in [r[1] for r in self.db.execute('PRAGMA table_info(torrents)')]:
+            self.db.execute('ALTER TABLE torrents ADD COLUMN digest TEXT')
+        
+    def close(self):
+        self.db.close()
+        
+    def sync(self, hashes=None):
+        """
+            Mirrors all torrents, or only :hashes: if given.
+            Torrents missing from rTorrent are only deleted on a full sync.
+            Returns counts: {'upserted': int, 'deleted': int, 'unchanged': int}
+        """
+        torrents = self.rt.get_torrents(hashes=hashes, include_trackers=True, include_files=True)
+        existing = dict(self.db.execute('SELECT hash, digest FROM torrents').fetchall())
+        synced = int(time.time())
+        seen = set()
+        upserted = 0
+        with self.db:
+            for torrent in torrents:
+                _hash = torrent.get('hash')
+                if not _hash:
+                    continue
+                seen.add(_hash)
+                data = json.dumps(self.snapshot(torrent), sort_keys=True, default=str)
+                digest = sha1(data.encode()).hexdigest()
+                if existing.get(_hash) == digest:
+                    continue
+                self.upsert(_hash, torrent, data, digest, synced)
+                upserted += 1
+            deleted = hashes is None and [h for h in existing if h not in seen] or []
+            self.delete(deleted)
+        return {'upserted': upserted, 'deleted': len(deleted), 'unchanged': len(seen) - upserted}
+        
+    def snapshot(self, torrent):
+        """
+            Torrent without the volatile keys, this is what is stored and compared on sync.
+        """
+        output = {k: v for k, v in torrent.items() if k not in self._volatile_keys_}
+        if isinstance(output.get('trackers'), list):
+            output['trackers'] = [{k: v for k, v in t.items() if k not in self._volatile_tracker_keys_} for t in output['trackers']]
+        return output
+        
+    def upsert(self, _hash, torrent, data, digest, synced):
+        keys = list(self._columns_.keys())
+        self.db.execute(
+            f'INSERT OR REPLACE INTO torrents (hash, {", ".join(keys)}, data, digest, synced) VALUES ({", ".join(["?"] * (len(keys) + 4))})',
+            # Lists can't be bound, ex: d.views is [] for torrents without a ratio group
+            [_hash, *[not isinstance(torrent.get(k), list) and torrent.get(k) or None for k in keys], data, digest, synced]
+        )
+        self.db.execute('DELETE FROM trackers WHERE hash = ?', (_hash,))
+        self.db.execute('DELETE FROM files WHERE hash = ?', (_hash,))
+        self.db.executemany(
+            'INSERT INTO trackers VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(_hash, t.get('url'), urlparse(t.get('url') or '').hostname, t.get('is_enabled'), t.get('scrape_complete'),
+              t.get('scrape_incomplete'), t.get('failed_counter'), t.get('success_counter')) for t in torrent.get('trackers') or []]
+        )
+        self.db.executemany(
+            'INSERT INTO files VALUES (?, ?, ?, ?)',
+            [(_hash, f.get('path'), f.get('size'), f.get('is_complete')) for f in torrent.get('files') or []]
+        )
+        
+    def delete(self, hashes):
+        if isinstance(hashes, str):
+            hashes = [hashes]
+        params = [(h,) for h in hashes]
+        for table in ['torrents', 'trackers', 'files']:
+            self.db.executemany(f'DELETE FROM {table} WHERE hash = ?', params)
+            
+    def build_query(self, tracker=None, label=None, ratio_group=None, ratio_below=None, ratio_above=None,
+                    older_than_days=None, newer_than_days=None, is_complete=None, path=None, where=None, params=None):
+        clauses = []
+        values = []
+        if tracker is not None:
+            clauses.append('hash IN (SELECT hash FROM trackers WHERE host = ? OR url = ?)')
+            values += [tracker, tracker]
+        if label is not None:
+            clauses.append('label = ?')
+            values.append(quote(label))
+        if ratio_group is not None:
+            clauses.append('ratio_group = ?')
+            values.append(ratio_group)
+        if ratio_below is not None:
+            clauses.append('ratio < ?')
+            values.append(ratio_below)
+        if ratio_above is not None:
+            clauses.append('ratio > ?')
+            values.append(ratio_above)
+        if older_than_days is not None:
+            clauses.append('timestamp_added < ?')
+            values.append(int(time.time() - older_than_days * 86400))
+        if newer_than_days is not None:
+            clauses.append('timestamp_added >= ?')
+            values.append(int(time.time() - newer_than_days * 86400))
+        if is_complete is not None:
+            clauses.append('is_complete = ?')
+            values.append(int(is_complete))
+        if path is not None:
+            clauses.append('hash IN (SELECT hash FROM files WHERE path = ?)')
+            values.append(path)
+        if where:
+            clauses.append(f'({where})')
+            values += list(params or [])
+        return clauses and f' WHERE {" AND ".join(clauses)}' or '', values
+        
+    def query(self, **kwargs):
+        """
+            Returns list of hashes matching all filters, answered from the local index.
+                :tracker:           tracker host or full announce url
+                :label:             label as passed to add_torrent
+                :ratio_group:       ratio group 1-8
+                :ratio_below:       ratio < n
+                :ratio_above:       ratio > n
+                :older_than_days:   added more than n days ago
+                :newer_than_days:   added within the last n days
+                :is_complete:       True | False
+                :path:              contains file with relative path
+                :where:, :params:   extra raw SQL condition on the torrents table
+        """
+        where, values = self.build_query(**kwargs)
+        return [r[0] for r in self.db.execute(f'SELECT hash FROM torrents{where}', values)]
+        
+    def torrents(self, **kwargs):
+        """
+            Same filters as query(), returns the mirrored torrent dicts.
+        """
+        where, values = self.build_query(**kwargs)
+        return [json.loads(r[0]) for r in self.db.execute(f'SELECT data FROM torrents{where}', values)]
+
+
+class FileCatalogue:
+    """
+        In-memory index of every loaded torrent's files, built from one file-only
+        d.multicall2 sweep (hash, f.path, f.size_bytes).
+            - size index:   size -> {(hash, path)}
+            - path trie:    path components -> {hash: size}
+            - fingerprint:  sha1 of a torrent's sorted (path, size) list -> {hash}
+        Example:
+            catalogue = FileCatalogue(rt)
+            catalogue.refresh()
+            catalogue.match('/path/to/candidate.torrent')
+    """
+    
+    def __init__(self, rt):
+        self.rt = rt
+        self.files = {}
+        self.fingerprints = {}
+        self.by_fingerprint = {}
+        self.sizes = {}
+        self.trie = {}
+        
+    @staticmethod
+    def fingerprint(files):
+        return sha1('\n'.join([f'{path}\0{size}' for path, size in sorted(files)]).encode()).hexdigest()
+        
+    def refresh(self, view='default'):
+        """
+            Sweeps all torrent files and only reindexes torrents that were added, changed or removed.
+            Returns counts: {'indexed': int, 'removed': int, 'unchanged': int}
+        """
+        methods = RPCMethods.scan('files', keys=['path', 'size'], view=view)
+        response = self.rt.client.system.multicall(methods)
+        if len(response) > 0 and isinstance(response[0], dict) and response[0].get('faultCode'):
+            raise Exception(f'Error in FileCatalogue.refresh, error response:\n{pformat(response)}\n')
+        seen = set()
+        indexed = 0
+        for _hash, rows in response and response[0] and response[0][0] or []:
+            seen.add(_hash)
+            files = [(path, size) for path, size in rows]
+            if self.fingerprints.get(_hash) == self.fingerprint(files):
+                continue
+            self.unindex(_hash)
+            self.index(_hash, files)
+            indexed += 1
+        removed = [h for h in self.files if h not in seen]
+        for _hash in removed:
+            self.unindex(_hash)
+        return {'indexed': indexed, 'removed': len(removed), 'unchanged': len(seen) - indexed}
+        
+    def index(self, _hash, files):
+        fp = self.fingerprint(files)
+        self.files[_hash] = files
+        self.fingerprints[_hash] = fp
+        self.by_fingerprint.setdefault(fp, set()).add(_hash)
+        for path, size in files:
+            self.sizes.setdefault(size, set()).add((_hash, path))
+            node = self.trie
+            for part in path.split('/'):
+                node = node.setdefault(part, {})
+            node.setdefault(None, {})[_hash] = size
+            
+    def unindex(self, _hash):
+        files = self.files.pop(_hash, None)
+        if files is None:
+            return
+        fp = self.fingerprints.pop(_hash)
+        self.by_fingerprint[fp].discard(_hash)
+        if not self.by_fingerprint[fp]:
+            del self.by_fingerprint[fp]
+        for path, size in files:
+            self.sizes[size].discard((_hash, path))
+            if not self.sizes[size]:
+                del self.sizes[size]
+            nodes = [self.trie]
+            parts = path.split('/')
+            for part in parts:
+                nodes.append(nodes[-1][part])
+            nodes[-1][None].pop(_hash, None)
+            if not nodes[-1][None]:
+                del nodes[-1][None]
+            for parent, part, node in reversed(list(zip(nodes, parts, nodes[1:]))):
+                if node:
+                    break
+                del parent[part]
+                
+    def lookup(self, path):
+        node = self.trie
+        for part in path.split('/'):
+            node = node.get(part)
+            if node is None:
+                return {}
+        return node.get(None) or {}
+        
+    def find(self, size, path=None):
+        """
+            Hashes of torrents containing a file of :size: bytes, and relative :path: if given.
+        """
+        if path is not None:
+            return [h for h, s in self.lookup(path).items() if s == size]
+        return list({h for h, p in self.sizes.get(size, ())})
+        
+    def find_path(self, prefix):
+        """
+            Hashes of torrents with a file at or below the relative path :prefix:.
+        """
+        node = self.trie
+        for part in [p for p in prefix.split('/') if p]:
+            node = node.get(part)
+            if node is None:
+                return []
+        hashes = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for k, v in node.items():
+                if k is None:
+                    hashes.update(v)
+                else:
+                    stack.append(v)
+        return list(hashes)
+        
+    def match(self, torrent, exact=False):
+        """
+            Cross-seed match for a candidate torrent parsed with BencodeUtils.
+                :torrent:   <bytes> | <path> | decoded metainfo dict
+                :exact:     only torrents with identical file lists, otherwise
+                            any torrent containing every file of the candidate
+        """
+        files = self.rt.bencode.info_to_files(self.rt.bencode.to_obj(torrent)['info'])
+        if exact:
+            return list(self.by_fingerprint.get(self.fingerprint(files), ()))
+        # Start from the least common size to keep the candidate set small
+        files = sorted(files, key=lambda f: len(self.sizes.get(f[1], ())))
+        candidates = None
+        for path, size in files:
+            hashes = {h for h, s in self.lookup(path).items() if s == size}
+            candidates = hashes if candidates is None else candidates & hashes
+            if not candidates:
+                return []
+        return list(candidates or [])
+        
+    def duplicates(self):
+        """
+            Groups of hashes with identical content (same relative paths and sizes).
+        """
+        return [sorted(hashes) for hashes in self.by_fingerprint.values() if len(hashes) > 1]
+
+
+class MutationJob:
+    
+    def __init__(self, method, hashes, args=(), priority='bulk', callback=None):
+        self.method = method
+        self.hashes = hashes
+        self.args = args
+        self.priority = priority
+        self.callback = callback
+        self.offset = 0
+        self.results = []
+        self.errors = []
+        self.failed = []
+        self.cancelled = False
+        self.time_started = None
+        self.time_finished = None
+        self.done_event = threading.Event()
+        
+    @property
+    def done(self):
+        return self.done_event.is_set()
+        
+    @property
+    def progress(self):
+        total = len(self.hashes)
+        elapsed = self.time_started and (self.time_finished or time.time()) - self.time_started or 0
+        rate = elapsed and self.offset / elapsed or 0
+        done = self.offset - len(self.failed)
+        return {
+            'method':       self.method,
+            'done':         done,
+            'failed':       len(self.failed),
+            'total':        total,
+            'percent':      total and round(done / total * 100, 2) or 100.0,
+            'errors':       len(self.errors),
+            'eta':          (not self.done and rate) and round((total - self.offset) / rate, 1) or None,
+            'cancelled':    self.cancelled,
+            'finished':     self.done
+        }
+        
+    def cancel(self):
+        """
+            Batches already sent are not undone, the remaining hashes are skipped.
+        """
+        self.cancelled = True
+        
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+        
+    def finish(self):
+        self.time_finished = time.time()
+        self.done_event.set()
+
+
+class MutationScheduler:
+    """
+        Splits Torrent mutations into paced batches so rTorrent's single-threaded
+        event loop is never blocked long enough to drop peers or stall trackers.
+            :ops_per_second:    target torrents mutated per second, None for no limit
+            :batch_size:        hashes sent per request
+            :target_latency:    seconds, if set the batch size is halved when a request
+                                takes longer and grown again while it stays below
+        Interactive jobs are always sent before queued bulk jobs.
+        The worker thread uses its own connection (rt.clone()), so :rt: stays usable from the caller's thread.
+        Example:
+            scheduler = MutationScheduler(rt, ops_per_second=200)
+            scheduler.start()
+            job = scheduler.submit_all('remove_and_delete', ratio_group=3)
+            job.wait()
+            scheduler.stop()
+    """
+    
+    _methods_ = ['start', 'stop', 'pause', 'unpause', 'check_hash', 'remove', 'remove_and_delete',
+                 'set_ratio_group', 'remove_ratio_group', 'set_label']
+    _priorities_ = ['interactive', 'bulk']
+    
+    def __init__(self, rt, ops_per_second=100, batch_size=50, target_latency=None, min_batch_size=1, max_batch_size=500):
+        self.rt = rt
+        self.ops_per_second = ops_per_second
+        self.batch_size = batch_size
+        self.target_latency = target_latency
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.last_latency = None
+        self.lanes = {p: deque() for p in self._priorities_}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        
+    def submit(self, method, hashes, *args, priority='bulk', callback=None):
+        """
+            :method:    name of a Torrent mutation method, ex: 'stop'
+            :hashes:    hash or list of hashes
+            :args:      extra arguments, ex: the ratio group for 'set_ratio_group'
+            :callback:  called with the job after every batch
+        """
+        if method not in self._methods_:
+            raise ValueError(f'Invalid method "{method}", must be one of {self._methods_}.')
+        if priority not in self._priorities_:
+            raise ValueError(f'Invalid priority "{priority}", must be one of {self._priorities_}.')
+        if isinstance(hashes, str):
+            hashes = [hashes]
+        job = MutationJob(method, list(hashes), args=args, priority=priority, callback=callback)
+        with self.condition:
+            self.lanes[priority].append(job)
+            self.condition.notify()
+        return job
+        
+    def submit_all(self, method, *args, view='default', ratio_group=None, priority='bulk', callback=None):
+        """
+            Same as the Torrent *_all methods, hashes in :view: are fetched first and then paced.
+        """
+        return self.submit(method, self.rt.get_hashes(view=view, ratio_group=ratio_group), *args, priority=priority, callback=callback)
+        
+    def next_job(self):
+        with self.condition:
+            for priority in self._priorities_:
+                lane = self.lanes[priority]
+                while lane and (lane[0].cancelled or lane[0].offset >= len(lane[0].hashes)):
+                    lane.popleft().finish()
+                if lane:
+                    return lane[0]
+        return None
+        
+    def step(self, rt=None):
+        """
+            Sends one batch of the highest priority job, returns False if nothing is queued.
+            Hashes whose batch raised or whose result holds a fault are added to job.failed.
+        """
+        rt = rt or self.rt
+        job = self.next_job()
+        if job is None:
+            return False
+        job.time_started = job.time_started or time.time()
+        batch = job.hashes[job.offset:job.offset + self.batch_size]
+        t_start = time.time()
+        try:
+            results = getattr(rt, job.method)(batch, *job.args) or []
+            job.results += results
+            if len(results) == len(batch):
+                job.failed += [_hash for _hash, result in zip(batch, results) if RPCMethodHelpers.has_fault(result)]
+        except Exception as e:
+            job.errors.append((batch, e))
+            job.failed += batch
+        latency = time.time() - t_start
+        job.offset += len(batch)
+        self.last_latency = latency
+        self.adjust_batch_size(latency)
+        if job.callback:
+            job.callback(job)
+        self.next_job()
+        self.pace(len(batch), latency)
+        return True
+        
+    def adjust_batch_size(self, latency):
+        if self.target_latency is None:
+            return
+        if latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        else:
+            self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 10))
+            
+    def pace(self, count, latency):
+        if not self.ops_per_second:
+            return
+        delay = count / self.ops_per_second - latency
+        if delay > 0:
+            with self.condition:
+                self.condition.wait_for(lambda: not self.running and self.thread is not None, timeout=delay)
+                
+    def run_pending(self):
+        """
+            Runs queued jobs to completion in the calling thread.
+        """
+        while self.step():
+            pass
+            
+    def run(self):
+        rt = self.rt.clone()
+        while self.running:
+            if not self.step(rt):
+                with self.condition:
+                    self.condition.wait_for(lambda: not self.running or any(self.lanes.values()))
+                    
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        
+    def stop(self, cancel=False):
+        """
+            Stops the worker after the current batch, :cancel: also cancels queued jobs.
+        """
+        with self.condition:
+            self.running = False
+            if cancel:
+                for lane in self.lanes.values():
+                    for job in lane:
+                        job.cancel()
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if cancel:
+            self.next_job()
+
+
+class HashCheckQueue:
+    """
+        Rechecks torrents with at most :max_active: in d.hashing at a time,
+        starting the next one as slots free up, instead of check_hash_all
+        saturating disk I/O for every torrent at once.
+            :order:             'size' (smallest first) | '-size' (largest first) | 'priority' (d.priority, then size)
+            :poll_interval:     seconds between status polls in run()
+        Failures are flagged server-side through event.download.hash_failed,
+        the handler is removed by close(), which run() calls once the queue is drained.
+        Hashes that are not loaded, or disappear while queued, are reported as failed.
+        Example:
+            queue = HashCheckQueue(rt, max_active=2)
+            queue.add(rt.get_hashes())
+            results = queue.run(callback=lambda q: print(q.progress))
+    """
+    
+    _failed_key_ = 'pyruTorrent_hash_failed'
+    _orders_ = ['size', '-size', 'priority']
+    
+    def __init__(self, rt, max_active=1, order='size', poll_interval=5):
+        if order not in self._orders_:
+            raise ValueError(f'Invalid order "{order}", must be one of {self._orders_}.')
+        self.rt = rt
+        self.max_active = max_active
+        self.order = order
+        self.poll_interval = poll_interval
+        self.pending = []
+        self.active = {}
+        self.results = {}
+        self.sizes = {}
+        self.time_started = None
+        self.bytes_hashed = 0
+        self.event_installed = False
+        
+    def add(self, hashes):
+        if isinstance(hashes, str):
+            hashes = [hashes]
+        hashes = list(hashes)
+        torrents = hashes and self.rt.get_torrents(hashes=hashes, only_keys=['hash', 'bytes_total', 'priority'], strict=False) or []
+        for _hash, torrent in zip(hashes, torrents):
+            if RPCMethodHelpers.has_fault(torrent):
+                self.fail(_hash, torrent)
+                continue
+            self.sizes[torrent['hash']] = torrent.get('bytes_total') or 0
+            self.pending.append(torrent)
+        if self.order == 'size':
+            self.pending.sort(key=lambda t: t.get('bytes_total') or 0)
+        elif self.order == '-size':
+            self.pending.sort(key=lambda t: -(t.get('bytes_total') or 0))
+        else:
+            self.pending.sort(key=lambda t: (-(t.get('priority') or 0), t.get('bytes_total') or 0))
+            
+    def install_failed_event(self):
+        if not self.event_installed:
+            self.rt.set_event('event.download.hash_failed', self._failed_key_, f'd.custom.set={self._failed_key_},1')
+            self.event_installed = True
+            
+    def close(self):
+        """
+            Removes the event.download.hash_failed handler from the server.
+        """
+        if self.event_installed:
+            self.rt.remove_event('event.download.hash_failed', self._failed_key_)
+            self.event_installed = False
+            
+    def poll(self):
+        methods = []
+        hashes = list(self.active.keys())
+        for _hash in hashes:
+            methods += RPCMethods.hash_check_status(_hash, self._failed_key_)
+        for _hash, status in zip(hashes, self.rt.multicall(methods, count=len(hashes), strict=False)):
+            if RPCMethodHelpers.has_fault(status):
+                self.active.pop(_hash)
+                self.fail(_hash, status)
+            elif status.get('failed') == '1':
+                self.finish(_hash, 'failed', status)
+            elif not status.get('hashing') and not status.get('hashing_checking'):
+                self.finish(_hash, 'done', status)
+            else:
+                self.active[_hash]['status'] = status
+                
+    def finish(self, _hash, result, status):
+        item = self.active.pop(_hash)
+        self.bytes_hashed += self.sizes.get(_hash, 0)
+        self.results[_hash] = {
+            'result':       result,
+            'is_complete':  bool(status.get('is_complete')),
+            'seconds':      round(time.time() - item['time_started'], 1)
+        }
+        
+    def fail(self, _hash, response):
+        """
+            Torrent could not be queried or started, usually because it is not loaded.
+        """
+        fault = RPCMethodHelpers.is_fault(response) and response or next(v for v in response.values() if RPCMethodHelpers.is_fault(v))
+        self.sizes.pop(_hash, None)
+        self.results[_hash] = {
+            'result':       'failed',
+            'is_complete':  False,
+            'seconds':      0,
+            'error':        fault.get('faultString')
+        }
+        
+    def fill(self):
+        methods = []
+        started = []
+        while self.pending and len(self.active) + len(started) < self.max_active:
+            _hash = self.pending.pop(0)['hash']
+            methods += RPCMethods.hash_check_start(_hash, self._failed_key_)
+            started.append(_hash)
+        if methods:
+            for _hash, response in zip(started, self.rt.multicall(methods, count=len(started), strict=False)):
+                if RPCMethodHelpers.has_fault(response):
+                    self.fail(_hash, response)
+                    continue
+                self.active[_hash] = {'time_started': time.time(), 'status': {}}
+                
+    def step(self):
+        """
+            Polls active checks and starts pending ones, returns False once everything finished.
+        """
+        self.install_failed_event()
+        self.time_started = self.time_started or time.time()
+        if self.active:
+            self.poll()
+        self.fill()
+        return bool(self.active or self.pending)
+        
+    def run(self, callback=None):
+        try:
+            while self.step():
+                if callback:
+                    callback(self)
+                time.sleep(self.poll_interval)
+        finally:
+            self.close()
+        if callback:
+            callback(self)
+        return self.results
+        
+    @property
+    def progress(self):
+        bytes_active = 0
+        for _hash, item in self.active.items():
+            status = item['status']
+            if status.get('chunks_total'):
+                bytes_active += self.sizes.get(_hash, 0) * (status.get('chunks_hashed') or 0) / status['chunks_total']
+        bytes_total = sum(self.sizes.values())
+        bytes_done = self.bytes_hashed + bytes_active
+        elapsed = self.time_started and time.time() - self.time_started or 0
+        rate = elapsed and bytes_done / elapsed or 0
+        return {
+            'pending':      len(self.pending),
+            'active':       list(self.active.keys()),
+            'done':         len([r for r in self.results.values() if r['result'] == 'done']),
+            'failed':       [h for h, r in self.results.items() if r['result'] == 'failed'],
+            'bytes_done':   int(bytes_done),
+            'bytes_total':  bytes_total,
+            'eta':          rate and round((bytes_total - bytes_done) / rate, 1) or None
+        }
+
+
+class TableWriter:
+    """
+        Appends pages of flat dict rows to a file, columns are taken from the first page.
+    """
+    
+    def __init__(self, fp):
+        self.fp = fp
+        self.count = 0
+        self.columns = None
+        
+    @staticmethod
+    def for_format(format):
+        writers = {'jsonl': JSONLTableWriter, 'csv': CSVTableWriter, 'parquet': ParquetTableWriter}
+        if format not in writers:
+            raise ValueError(f'Invalid format "{format}", must be one of {list(writers.keys())}.')
+        if format == 'parquet' and pyarrow is None:
+            raise ValueError('Format "parquet" requires pyarrow to be installed.')
+        return writers[format]
+        
+    @staticmethod
+    def flatten(torrents, groups):
+        """
+            Splits get_torrents output into a torrents table and one child table per KeyMaps group.
+        """
+        tables = {table: [] for table in ['torrents', *groups]}
+        for torrent in torrents:
+            row = {}
+            for key, val in torrent.items():
+                if key in KeyMaps._maps_:
+                    if key in tables:
+                        tables[key] += [{'hash': torrent.get('hash'), **item} for item in val or []]
+                    continue
+                if isinstance(val, list) and not val:
+                    val = None
+                elif isinstance(val, (list, dict)):
+                    val = json.dumps(val)
+                row[key] = val
+            tables['torrents'].append(row)
+        return tables
+        
+    def write(self, rows):
+        if not rows:
+            return
+        if self.columns is None:
+            self.columns = list(rows[0].keys())
+            self.open(rows)
+        self.write_rows(rows)
+        self.count += len(rows)
+        
+    def open(self, rows):
+        pass
+        
+    def close(self):
+        pass
+
+
+class JSONLTableWriter(TableWriter):
+    
+    def open(self, rows):
+        self.f = open(self.fp, 'w', encoding='utf-8')
+        
+    def write_rows(self, rows):
+        self.f.writelines([json.dumps(row, default=str) + '\n' for row in rows])
+        
+    def close(self):
+        if self.columns is not None:
+            self.f.close()
+
+
+class CSVTableWriter(TableWriter):
+    
+    def open(self, rows):
+        self.f = open(self.fp, 'w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.f, fieldnames=self.columns, extrasaction='ignore')
+        self.writer.writeheader()
+        
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+        
+    def close(self):
+        if self.columns is not None:
+            self.f.close()
+
+
+class ParquetTableWriter(TableWriter):
+    """
+        Each page is written as one row group. Columns that are empty on
+        the first page, or hold mixed types, are stored as strings.
+    """
+    
+    # Python types that share an Arrow type when inferred together
+    _kinds_ = {bool: 'bool', int: 'number', float: 'number', str: 'string'}
+    
+    def open(self, rows):
+        kinds = {k: set() for k in self.columns}
+        for row in rows:
+            for k, v in row.items():
+                if v is not None and k in kinds:
+                    kinds[k].add(self._kinds_.get(type(v), 'string'))
+        self.string_columns = [k for k, kind in kinds.items() if len(kind) != 1 or kind == {'string'}]
+        self.coerce(rows)
+        fields = []
+        for field in pyarrow.Table.from_pylist(rows).schema:
+            fields.append(field.name in self.string_columns and pyarrow.field(field.name, pyarrow.string()) or field)
+        self.schema = pyarrow.schema(fields)
+        self.writer = pyarrow.parquet.ParquetWriter(self.fp, self.schema)
+        
+    def coerce(self, rows):
+        for row in rows:
+            for key in self.string_columns:
+                if row.get(key) is not None and not isinstance(row[key], str):
+                    row[key] = str(row[key])
+                    
+    def write_rows(self, rows):
+        self.coerce(rows)
+        self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+        
+    def close(self):
+        if self.columns is not None:
+            self.writer.close()